@@ -0,0 +1,144 @@
+"""
+Detector plugins for main.py.
+
+Each detector is registered under a name with @register and turns a BGR frame
+into a list of Detection results. main.py enables detectors by name
+(--detectors yolo haar) and runs them concurrently on a thread pool with
+run_detectors(); OpenCV and PyTorch release the GIL while they work, so a
+frame takes about as long as the slowest detector rather than the sum.
+
+Adding a detector:
+    @register("mine")
+    class MyDetector:
+        color = (0, 0, 255)
+        def __init__(self, args): ...
+        def detect(self, frame): return [Detection(...), ...]
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+import cv2
+
+# name -> detector class
+DETECTORS = {}
+
+
+class Detection(NamedTuple):
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+    label: Optional[str]          # class name, e.g. "bottle" or "face"
+    confidence: Optional[float]
+    source: str                   # registry name of the detector that produced it
+    color: tuple                  # BGR colour used to draw the box
+
+
+def register(name):
+    """Class decorator adding a detector to DETECTORS under `name`."""
+    def wrap(cls):
+        cls.name = name
+        DETECTORS[name] = cls
+        return cls
+    return wrap
+
+
+def create_detectors(names, args):
+    """Instantiates the named detectors in the given order, once each.
+
+    Names are validated by main.py's --detectors choices.
+    """
+    # dict.fromkeys drops repeats but keeps first-seen order
+    return [DETECTORS[name](args) for name in dict.fromkeys(names)]
+
+
+def run_detectors(detectors, frame, pool: ThreadPoolExecutor = None):
+    """Runs every detector on the frame and returns their detections merged into one list.
+
+    With a pool and more than one detector they run concurrently; results keep detector order.
+    """
+    if pool is None or len(detectors) < 2:
+        return [d for detector in detectors for d in detector.detect(frame)]
+    futures = [pool.submit(detector.detect, frame) for detector in detectors]
+    return [d for future in futures for d in future.result()]
+
+
+def _to_numpy(value):
+    # support multiple result shapes/backends
+    try:
+        return value.cpu().numpy()
+    except Exception:
+        try:
+            return value.numpy()
+        except Exception:
+            # fallback to list-of-lists
+            return value if value is not None else []
+
+
+@register("yolo")
+class YoloDetector:
+    color = (0, 255, 0)
+    weights = "yolov8l.pt"
+
+    def __init__(self, args):
+        from ultralytics import YOLO
+
+        self.model = YOLO(self.weights)
+
+    def detect(self, frame):
+        # run yolo model on the frame (keep as color BGR input for YOLO)
+        result = self.model(frame)[0]
+        boxes = result.boxes
+        xyxy = _to_numpy(getattr(boxes, 'xyxy', []))
+        confs = _to_numpy(getattr(boxes, 'conf', []))
+        classes = _to_numpy(getattr(boxes, 'cls', []))
+        names = getattr(self.model, 'names', {})
+
+        detections = []
+        for i, b in enumerate(xyxy):
+            try:
+                x1, y1, x2, y2 = map(int, b[:4])
+            except Exception:
+                continue
+            try:
+                cls_i = int(classes[i]) if len(classes) > i else None
+            except Exception:
+                cls_i = None
+            try:
+                conf_i = float(confs[i]) if len(confs) > i else None
+            except Exception:
+                conf_i = None
+            label = names.get(cls_i, str(cls_i)) if cls_i is not None else None
+            detections.append(Detection(x1, y1, x2, y2, label, conf_i, self.name, self.color))
+        return detections
+
+
+@register("haar")
+class HaarFaceDetector:
+    color = (255, 0, 0)
+
+    def __init__(self, args):
+        # Use OpenCV's bundled haarcascade path so the XML is found reliably
+        cascade_path = os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise SystemExit(f"Failed to load cascade classifier from {cascade_path}. Check your OpenCV installation.")
+
+    def detect(self, frame):
+        # convert to grayscale for the Haar cascade detector
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        objects, reject_levels, confidence_levels = self.cascade.detectMultiScale3(
+            gray,
+            scaleFactor = 1.1,
+            minNeighbors = 3,
+            outputRejectLevels = True
+        )
+        detections = []
+        # objects is typically an array of rects: (x, y, w, h)
+        for rect in objects:
+            if len(rect) >= 4:
+                x, y, w, h = map(int, rect[:4])
+                detections.append(Detection(x, y, x + w, y + h, "face", None, self.name, self.color))
+        return detections
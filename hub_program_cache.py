@@ -0,0 +1,62 @@
+"""
+Content-hash cache for hub programs and their compiled MicroPython bytecode.
+
+The runner's action program is the same for every command (the command is
+sent over stdin), so its source is written to the cache once and the
+compiled .mpy is reused for every upload instead of being rebuilt each time.
+Entries are keyed by the SHA-256 of the source, the hub's MPY ABI and the
+pybricksdev version, so a changed program or toolchain simply misses.
+"""
+
+import hashlib
+from pathlib import Path
+
+# Cached sources (<hash>.py) and bytecode (<hash>.mpy) live here
+CACHE_DIR = Path(__file__).parent / ".hub_cache"
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def _toolchain_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("pybricksdev")
+    except Exception:
+        return "unknown"
+
+
+def program_path(source: str) -> Path:
+    """Returns a file holding `source`, writing it only if it is not cached yet."""
+    path = CACHE_DIR / f"{_digest(source)}.py"
+    if not path.exists():
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(source, encoding="utf-8")
+        tmp.replace(path)
+    return path
+
+
+async def compiled_program(py_path, abi):
+    """Returns (mpy_bytes, cache_hit) for the program at py_path.
+
+    Compiles with pybricksdev only on a cache miss.
+    """
+    source = Path(py_path).read_bytes()
+    mpy_path = CACHE_DIR / f"{_digest(source, abi, _toolchain_version())}.mpy"
+    if mpy_path.exists():
+        return mpy_path.read_bytes(), True
+
+    from pybricksdev.compile import compile_multi_file
+
+    mpy = await compile_multi_file(str(py_path), abi)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = mpy_path.with_suffix(".tmp")
+    tmp.write_bytes(mpy)
+    tmp.replace(mpy_path)
+    return mpy, False
@@ -0,0 +1,101 @@
+"""
+Runs a program on the hub like `pybricksdev run ble`, but uploads cached
+bytecode from hub_program_cache instead of recompiling the source each time.
+
+    python hub_upload.py -n <hub name> <program.py> < input.txt
+
+Everything on stdin (read up front, until EOF) is forwarded to the program's
+stdin; the program's output is printed as it arrives.
+
+Exits with EXIT_INCOMPATIBLE when the hub firmware or the installed pybricksdev
+cannot be used at all, so the runner does not retry what will never work.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import hub_program_cache
+
+# Exit code for permanent problems (unsupported firmware or pybricksdev version)
+EXIT_INCOMPATIBLE = 3
+
+# PybricksHubBLE members this module relies on. Some are private, so they are checked
+# up front to fail loudly if pybricksdev differs from the version in requirements.txt.
+REQUIRED_HUB_MEMBERS = (
+    "_capability_flags",
+    "_wait_for_user_program_stop",
+    "print_output",
+    "download_user_program",
+    "start_user_program",
+    "write_line",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a program on a Pybricks hub using cached bytecode")
+    parser.add_argument('-n', '--name', default=None, help='Hub BLE name')
+    parser.add_argument('script', help='Path to the MicroPython program')
+    return parser.parse_args()
+
+
+def _incompatible(message):
+    print(f"[Upload] {message}", flush=True)
+    raise SystemExit(EXIT_INCOMPATIBLE)
+
+
+def check_hub(hub):
+    """Returns the MPY ABI to compile for, or exits with EXIT_INCOMPATIBLE.
+
+    Same capability check as PybricksHubBLE.run(): the hub must accept multi-file
+    MPY v6 programs, and (6, 1) is used when it also accepts native code.
+    Hubs on Pybricks protocol < 1.2.0 report no capabilities and are not supported.
+    """
+    from pybricksdev.ble.pybricks import HubCapabilityFlag
+
+    missing = [name for name in REQUIRED_HUB_MEMBERS if not hasattr(hub, name)]
+    if missing:
+        _incompatible(f"Installed pybricksdev lacks {', '.join(missing)}; "
+                      f"install the version pinned in requirements.txt")
+    flags = hub._capability_flags
+    if not flags & (HubCapabilityFlag.USER_PROG_MULTI_FILE_MPY6 | HubCapabilityFlag.USER_PROG_MULTI_FILE_MPY6_1_NATIVE):
+        _incompatible("Hub firmware does not accept multi-file MPY v6 programs; update the Pybricks firmware")
+    if flags & HubCapabilityFlag.USER_PROG_MULTI_FILE_MPY6_1_NATIVE:
+        return (6, 1)
+    return 6
+
+
+async def run(hub_name, script, stdin_lines):
+    from pybricksdev.ble import find_device
+    from pybricksdev.connections.pybricks import PybricksHubBLE
+
+    device = await find_device(hub_name)
+    hub = PybricksHubBLE(device)
+    await hub.connect()
+    try:
+        abi = check_hub(hub)
+        start = time.perf_counter()
+        # The ABI is only known once connected; it is part of the cache key
+        mpy, hit = await hub_program_cache.compiled_program(script, abi)
+        print(f"[Upload] {'cache hit' if hit else 'compiled'} in {(time.perf_counter() - start) * 1000:.1f}ms", flush=True)
+
+        # Same steps as PybricksHubBLE.run(), minus the compile
+        hub.print_output = True
+        await hub.download_user_program(mpy)
+        await hub.start_user_program()
+        for line in stdin_lines:
+            await hub.write_line(line)
+        await hub._wait_for_user_program_stop()
+    finally:
+        await hub.disconnect()
+
+
+def main():
+    args = parse_args()
+    stdin_lines = [ln.rstrip("\r\n") for ln in sys.stdin] if not sys.stdin.isatty() else []
+    asyncio.run(run(args.name, args.script, stdin_lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Frame-to-motion latency tracing shared by main.py and robot_runner.py.
+
+A trace ID is assigned when a frame is captured and travels with the
+command it produces. Timestamps are wall-clock seconds (time.time()) so
+they can be compared across the main.py and robot_runner.py processes.
+
+On the wire a traced command looks like:
+    SHOULDER:-5 #trace=1a2b3c4d;capture=1730000000.123;detect=...;emit=...
+The hub program acknowledges with `TRACE_START <id>` / `TRACE_DONE <id>`
+lines, which the runner timestamps as they arrive.
+"""
+
+import time
+import uuid
+
+# Marks the start of the trace section of a command line
+TRACE_MARKER = " #trace="
+
+# Pipeline stages in the order they happen
+STAGES = ("capture", "detect", "emit", "dispatch", "hub_start", "hub_done")
+
+# Acknowledgement lines printed by the hub program
+HUB_START_PREFIX = "TRACE_START "
+HUB_DONE_PREFIX = "TRACE_DONE "
+
+
+def new_trace_id() -> str:
+    """Returns a short random ID for a captured frame."""
+    return uuid.uuid4().hex[:8]
+
+
+def now() -> float:
+    """Timestamp used for every stage (wall clock, comparable across processes)."""
+    return time.time()
+
+
+def encode(command: str, trace_id: str, stamps: dict) -> str:
+    """Appends the trace ID and stage timestamps to a command."""
+    fields = [f"{stage}={stamps[stage]:.6f}" for stage in STAGES if stage in stamps]
+    return f"{command}{TRACE_MARKER}{trace_id}" + "".join(f";{f}" for f in fields)
+
+
+def decode(line: str):
+    """Splits a command line into (command, trace_id, stamps).
+
+    Lines without a trace section return (line, None, {}).
+    """
+    command, sep, rest = line.partition(TRACE_MARKER)
+    if not sep:
+        return line.strip(), None, {}
+    parts = rest.strip().split(";")
+    trace_id = parts[0]
+    stamps = {}
+    for part in parts[1:]:
+        key, _, value = part.partition("=")
+        try:
+            stamps[key] = float(value)
+        except ValueError:
+            continue
+    return command.strip(), trace_id, stamps
+
+
+def breakdown(stamps: dict) -> list:
+    """Returns [(label, milliseconds), ...] for consecutive recorded stages, plus the total."""
+    present = [stage for stage in STAGES if stage in stamps]
+    rows = []
+    for prev, cur in zip(present, present[1:]):
+        rows.append((f"{prev}->{cur}", (stamps[cur] - stamps[prev]) * 1000.0))
+    if len(present) >= 2:
+        rows.append(("total", (stamps[present[-1]] - stamps[present[0]]) * 1000.0))
+    return rows
+
+
+def format_breakdown(trace_id: str, stamps: dict) -> str:
+    """One-line human readable latency breakdown for a trace."""
+    rows = breakdown(stamps)
+    if not rows:
+        return f"trace {trace_id}: no timing data"
+    return f"trace {trace_id}: " + ", ".join(f"{label} {ms:.1f}ms" for label, ms in rows)
@@ -1,15 +1,17 @@
 import argparse
 import cv2
-import os
+from concurrent.futures import ThreadPoolExecutor
 
 import supervision as sv
-from ultralytics import YOLO
+
+import detectors
+import latency
 
 # DAVID TEST CODE
 
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="YOLOv8 Video Capture")
     parser.add_argument(
         '--webcam_resolution',
@@ -41,10 +43,71 @@ def parse_args():
         type=int,
         help='Degrees to move robot per adjustment (default: 5)'
     )
-    return parser.parse_args()
-
-def main():
-    args = parse_args()
+    parser.add_argument(
+        '--detectors',
+        default=['yolo', 'haar'],
+        nargs='+',
+        choices=sorted(detectors.DETECTORS),
+        help='Detectors to run on each frame, concurrently (default: yolo haar)'
+    )
+    parser.add_argument(
+        '--no_display',
+        action='store_true',
+        help='Do not open the preview window (headless runs)'
+    )
+    return parser.parse_args(argv)
+
+def steer_direction(x1, x2, center_left, center_right):
+    """Decides which way to look so the box [x1, x2] ends up in the center zone.
+    Returns "centered", "left" or "right".
+    """
+    # Calculate overlap between bounding box and center zone
+    # Find the intersection between bbox [x1, x2] and center zone [center_left, center_right]
+    overlap_left = max(x1, center_left)
+    overlap_right = min(x2, center_right)
+    overlap_width = max(0, overlap_right - overlap_left)
+
+    bbox_width = x2 - x1
+    overlap_fraction = overlap_width / bbox_width if bbox_width > 0 else 0
+
+    # If majority (>50%) of bbox is within center zone, it's centered
+    if overlap_fraction > 0.5:
+        return "centered"
+    # Calculate bounding box center for left/right determination
+    bbox_center_x = (x1 + x2) / 2
+    if bbox_center_x < center_left:
+        return "left"
+    return "right"
+
+def steer_command(direction, movement_step):
+    """Robot command for a steer_direction() result, or None when centered."""
+    if direction == "left":
+        return f"SHOULDER:{-movement_step}"
+    if direction == "right":
+        return f"SHOULDER:{movement_step}"
+    return None
+
+def open_webcam(frame_width, frame_height):
+    """Opens camera 0 at the requested resolution."""
+    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
+    return cap
+
+def print_command(command):
+    """Default command sink: robot_runner.py picks ROBOT_CMD lines up from the console output."""
+    print("ROBOT_CMD:" + command)
+
+def main(argv=None, open_capture=open_webcam, send_command=print_command, on_frame=None):
+    """Runs the vision loop.
+
+    open_capture(width, height) returns a cv2.VideoCapture-like object and
+    send_command(command) delivers each robot command; the simulation harness
+    swaps both. on_frame(direction), if given, is called after every frame with
+    the steer_direction() result for the target (None if not seen) and stops the
+    loop by returning True.
+    """
+    args = parse_args(argv)
     frame_width, frame_height = args.webcam_resolution
     frame_center_x = frame_width / 2
     
@@ -62,134 +125,67 @@ def main():
         print("   This script will send movement commands via console output.")
         robot_controller = "enabled"  # Simple flag for now
 
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
-
-    # Use OpenCV's bundled haarcascade path so the XML is found reliably
-    cascade_path = os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
-    cascade = cv2.CascadeClassifier(cascade_path)
+    cap = open_capture(frame_width, frame_height)
 
     if not cap.isOpened():
         raise SystemExit(f"Could not open camera at index 0. Try running `webcam.py` to enumerate camera indices.")
 
-    if cascade.empty():
-        raise SystemExit(f"Failed to load cascade classifier from {cascade_path}. Check your OpenCV installation.")
-
-    model = YOLO("yolov8l.pt")
+    active_detectors = detectors.create_detectors(args.detectors, args)
+    # One worker per detector so independent detectors run on the same frame concurrently
+    pool = ThreadPoolExecutor(max_workers=len(active_detectors)) if len(active_detectors) > 1 else None
 
     while True:
         ret, frame = cap.read()
         if not ret or frame is None:
             print("Failed to read frame from camera, stopping")
             break
-        # run yolo model on the frame (keep as color BGR input for YOLO)
-        result = model(frame)[0]
-        # convert to grayscale for the Haar cascade detector
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        objects, reject_levels, confidence_levels = cascade.detectMultiScale3(
-            gray, 
-            scaleFactor = 1.1, 
-            minNeighbors = 3, 
-            outputRejectLevels = True
-        )
+        # Tag the frame so any command it triggers can be traced back to it
+        trace_id = latency.new_trace_id()
+        stamps = {"capture": latency.now()}
+        results = detectors.run_detectors(active_detectors, frame, pool)
+        stamps["detect"] = latency.now()
         # Draw bounding boxes on a copy of the frame
         out = frame.copy()
-        # Draw YOLO boxes (support multiple result shapes/backends)
-        try:
-            xyxy = result.boxes.xyxy.cpu().numpy()
-        except Exception:
-            try:
-                xyxy = result.boxes.xyxy.numpy()
-            except Exception:
-                # fallback to list-of-lists
-                xyxy = getattr(result.boxes, 'xyxy', [])
-
-        # Gather confs and classes if available
-        try:
-            confs = result.boxes.conf.cpu().numpy()
-        except Exception:
-            try:
-                confs = result.boxes.conf.numpy()
-            except Exception:
-                confs = getattr(result.boxes, 'conf', [])
 
-        try:
-            classes = result.boxes.cls.cpu().numpy()
-        except Exception:
-            try:
-                classes = result.boxes.cls.numpy()
-            except Exception:
-                classes = getattr(result.boxes, 'cls', [])
-
-        # Draw each YOLO detection
-        for i, b in enumerate(xyxy):
-            try:
-                x1, y1, x2, y2 = map(int, b[:4])
-            except Exception:
-                continue
+        # Draw each detection
+        target = None
+        for det in results:
+            x1, y1, x2, y2 = det.x1, det.y1, det.x2, det.y2
             # build label text if class and confidence are available
             label = None
-            try:
-                cls_i = int(classes[i]) if len(classes) > i else None
-            except Exception:
-                cls_i = None
-            try:
-                conf_i = float(confs[i]) if len(confs) > i else None
-            except Exception:
-                conf_i = None
-
-            if cls_i is not None and conf_i is not None:
-                name = model.names.get(cls_i, str(cls_i)) if hasattr(model, 'names') else str(cls_i)
-                label = f"{name} {conf_i:.2f}"
-            elif conf_i is not None:
-                label = f"{conf_i:.2f}"
-
-            # Check if this detection matches the target object
-            if args.target_object and cls_i is not None:
-                detected_name = model.names.get(cls_i, '').lower() if hasattr(model, 'names') else ''
-                if detected_name == args.target_object.lower():
-                    # Calculate overlap between bounding box and center zone
-                    # Find the intersection between bbox [x1, x2] and center zone [center_left, center_right]
-                    overlap_left = max(x1, center_left)
-                    overlap_right = min(x2, center_right)
-                    overlap_width = max(0, overlap_right - overlap_left)
-                    
-                    bbox_width = x2 - x1
-                    overlap_fraction = overlap_width / bbox_width if bbox_width > 0 else 0
-                    
-                    # If majority (>50%) of bbox is within center zone, it's centered
-                    if overlap_fraction > 0.5:
-                        print("Centered")
-                        # Robot is already centered, no movement needed
-                    else:
-                        # Calculate bounding box center for left/right determination
-                        bbox_center_x = (x1 + x2) / 2
-                        
-                        if bbox_center_x < center_left:
-                            print("Look left")
-                            if robot_controller:
-                                # Send command that robot can receive
-                                print(f"ROBOT_CMD:SHOULDER:{-args.movement_step}")
-                        else:
-                            print("Look right")
-                            if robot_controller:
-                                # Send command that robot can receive
-                                print(f"ROBOT_CMD:SHOULDER:{args.movement_step}")
-
-            cv2.rectangle(out, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            if det.label is not None and det.confidence is not None:
+                label = f"{det.label} {det.confidence:.2f}"
+            elif det.confidence is not None:
+                label = f"{det.confidence:.2f}"
+
+            # Remember the most confident detection that matches the target object
+            if args.target_object and det.label is not None:
+                if det.label.lower() == args.target_object.lower():
+                    if target is None or (det.confidence or 0.0) > (target.confidence or 0.0):
+                        target = det
+
+            cv2.rectangle(out, (x1, y1), (x2, y2), det.color, 2)
             if label:
-                cv2.putText(out, label, (x1, max(10, y1 - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-        # Draw Haar cascade face detections (objects is typically an array of rects)
-        try:
-            for rect in objects:
-                # some return shapes: (x, y, w, h)
-                if len(rect) >= 4:
-                    x, y, w, h = map(int, rect[:4])
-                    cv2.rectangle(out, (x, y), (x + w, y + h), (255, 0, 0), 2)
-        except Exception:
-            # ignore drawing errors
-            pass
+                cv2.putText(out, label, (x1, max(10, y1 - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, det.color, 2)
+
+        # Steer toward at most one target per frame so each trace ID maps to one command
+        direction = None
+        if target is not None:
+            direction = steer_direction(target.x1, target.x2, center_left, center_right)
+            if direction == "centered":
+                print("Centered")
+                # Robot is already centered, no movement needed
+            else:
+                print("Look left" if direction == "left" else "Look right")
+                if robot_controller:
+                    # Send command that robot can receive
+                    stamps["emit"] = latency.now()
+                    command = steer_command(direction, args.movement_step)
+                    send_command(latency.encode(command, trace_id, stamps))
+        if on_frame is not None and on_frame(direction):
+            break
+        if args.no_display:
+            continue
         # Show the annotated frame
         cv2.imshow('Video Feed', out)
 
@@ -198,10 +194,12 @@ def main():
             break
     # end main loop
     cap.release()
+    if pool is not None:
+        pool.shutdown()
     
     # Shutdown message
     if robot_controller:
-        print("ROBOT_CMD:STOP")
+        send_command("STOP")
 
 
 
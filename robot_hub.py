@@ -61,7 +61,15 @@ def execute_command(command):
     command = command.strip()
     if not command:
         return
+    # Split off an optional " #trace=<id>;..." suffix (see latency.py on the PC)
+    trace_id = None
+    marker = command.find(" #trace=")
+    if marker >= 0:
+        trace_id = command[marker + len(" #trace="):].split(";")[0]
+        command = command[:marker].strip()
     print(f"Executing command: {command}")
+    if trace_id:
+        print(f"TRACE_START {trace_id}")
     
     try:
         if command.upper() == 'STOP':
@@ -106,6 +114,12 @@ def execute_command(command):
                 print(f"Unrecognized command format: '{command}'")
     except Exception as e:
         print(f"Error processing command: {e}")
+    if trace_id:
+        # Moves are started with wait=False; report done once the motors have actually finished,
+        # matching what TRACE_DONE means in the runner's action program
+        while not (motor_base.done() and motor_shoulder.done() and motor_elbow.done() and motor_gripper.done()):
+            wait(5)
+        print(f"TRACE_DONE {trace_id}")
 
 # ---- Main loop: listen for commands from host via stdin ----
 if sys is not None and hasattr(sys, "stdin"):
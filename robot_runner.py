@@ -1,27 +1,63 @@
+import os
 import sys
+import json
 import time
+import random
 import subprocess
 from pathlib import Path
 
+import hub_program_cache
+import hub_upload
+import latency
+
 # Absolute path to the commands file on the PC
 COMMANDS_FILE_PATH = Path(r"C:\Users\hackathon\dev\taco\taco-computer-vision\commands.txt")
+# A batch is claimed by renaming the commands file to this before reading it
+PROCESSING_FILE_PATH = COMMANDS_FILE_PATH.with_suffix(".processing")
 # Your hub BLE name as seen by pybricksdev - change if needed
 HUB_NAME = "test"
+# Command used to run a program on the hub; the script path is appended and the
+# command is written to its stdin. hub_upload.py reuses cached bytecode.
+# The simulation harness (sim/driver.py) swaps this for sim/hub_exec.py.
+HUB_RUN_COMMAND = [sys.executable, "-u", str(Path(__file__).parent / "hub_upload.py"), "-n", HUB_NAME]
+
+# Per-command latency breakdowns are appended here (CSV, one row per traced command)
+LATENCY_LOG_PATH = Path(__file__).parent / "latency_log.csv"
+
+# Prefix main.py puts in front of commands it prints
+ROBOT_CMD_PREFIX = "ROBOT_CMD:"
 
-# Where to write the temporary action script that will be sent to the hub
-TEMP_SCRIPT_PATH = Path(__file__).parent / "_robot_action_temp.py"
+# ---- Delivery policy ----
+# Retry delays grow exponentially (with jitter) from RETRY_BASE_DELAY up to RETRY_MAX_DELAY seconds
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 4.0
+# After this many undeliverable commands in a row, stop trying the hub for BREAKER_COOLDOWN seconds
+BREAKER_FAILURE_THRESHOLD = 2
+BREAKER_COOLDOWN = 10.0
+# Commands older than this (seconds since emitted/queued) are dropped instead of sent or retried.
+# One hub attempt is a fresh BLE scan (up to 10s), connect and upload, so this has to cover
+# several attempts plus backoff, and the wait behind earlier commands in the same batch.
+# Lower it to drop corrections sooner at the cost of fewer retries.
+MAX_COMMAND_AGE = 30.0
+# Return code of _run_command_on_hub when a command expired before it could be delivered
+RC_EXPIRED = -1
+# Commands that could not be delivered are appended here (JSON lines)
+DEAD_LETTER_PATH = Path(__file__).parent / "dead_letters.jsonl"
 
 
-def _generate_action_script(command: str) -> str:
+def _generate_action_script() -> str:
     """
     Returns a single-file Pybricks MicroPython program that:
     - initializes motors
-    - executes exactly one command (from the PC)
+    - reads exactly one command (from the PC) on stdin and executes it
     - stops and exits
-    This runs ON THE HUB via `pybricksdev run ble ...`.
+    This runs ON THE HUB via hub_upload.py. The source does not depend on the
+    command, so it is compiled once and cached (see hub_program_cache.py).
+    A " #trace=<id>" suffix on the command makes it print TRACE_START/TRACE_DONE.
     """
     # Keep this template ASCII-only (no emojis).
-    return f"""\
+    return """\
+import sys
 from pybricks.hubs import InventorHub
 from pybricks.pupdevices import Motor
 from pybricks.parameters import Port, Stop
@@ -61,8 +97,15 @@ def move_motor_by(motor, delta, min_angle, max_angle):
     motor.run_target(SPEED, target_angle, Stop.HOLD, wait=True)
 
 # ---- Execute one command ----
-cmd = "{command}".strip()
+cmd = sys.stdin.readline().strip()
+TRACE_ID = ""
+marker = cmd.find(" #trace=")
+if marker >= 0:
+    TRACE_ID = cmd[marker + len(" #trace="):].split(";")[0]
+    cmd = cmd[:marker].strip()
 print("Executing command:", cmd)
+if TRACE_ID:
+    print("TRACE_START " + TRACE_ID)
 try:
     if cmd.upper() == 'SHOULDER_UP':
         move_motor_by(motor_shoulder, 30, SHOULDER_MIN, SHOULDER_MAX)  # Tripled from 10 to 30 degrees!
@@ -103,84 +146,260 @@ try:
     motor_base.stop(); motor_shoulder.stop(); motor_elbow.stop(); motor_gripper.stop()
 except Exception:
     pass
+if TRACE_ID:
+    print("TRACE_DONE " + TRACE_ID)
 print("Done")
 """
 
 
-def _run_command_on_hub(cmd: str, max_retries: int = 3) -> int:
-    """Writes a temp script for the given command and runs it via pybricksdev.
+def _parse_command_line(line: str):
+    """Splits a line from the commands file into (command, trace_id, stamps).
+    Accepts both bare commands and main.py's `ROBOT_CMD:` output.
+    """
+    line = line.strip()
+    if line.startswith(ROBOT_CMD_PREFIX):
+        line = line[len(ROBOT_CMD_PREFIX):]
+    return latency.decode(line)
+
+
+def _record_latency(trace_id: str, stamps: dict) -> None:
+    """Prints the latency breakdown for a trace and appends it to LATENCY_LOG_PATH."""
+    print(f"[Runner] Latency {latency.format_breakdown(trace_id, stamps)}")
+    try:
+        new_file = not LATENCY_LOG_PATH.exists()
+        with LATENCY_LOG_PATH.open("a", encoding="utf-8") as f:
+            if new_file:
+                f.write("trace_id," + ",".join(latency.STAGES) + "\n")
+            values = [f"{stamps[stage]:.6f}" if stage in stamps else "" for stage in latency.STAGES]
+            f.write(trace_id + "," + ",".join(values) + "\n")
+    except Exception as e:
+        print(f"[Runner] Failed to write latency log: {e}")
+
+
+class CircuitBreaker:
+    """Stops hammering an unreachable hub.
+
+    closed:    commands go through; consecutive failures are counted
+    open:      commands are rejected until the cooldown has passed
+    half-open: one trial command is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            print("[Runner] Hub reachable again, circuit closed")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"[Runner] Hub unreachable, pausing deliveries for {self.cooldown:.0f}s")
+            self.opened_at = time.monotonic()
+
+
+_breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN)
+
+
+def _retry_delay(attempt: int) -> float:
+    """Jittered exponential backoff: half the capped delay plus a random share of the other half."""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _dead_letter(cmd: str, reason: str, trace_id: str = None, queued_at: float = None) -> None:
+    """Records a command that was not delivered in DEAD_LETTER_PATH."""
+    print(f"[Runner] Dead-lettered ({reason}): {cmd}")
+    entry = {"time": time.time(), "command": cmd, "reason": reason, "trace_id": trace_id, "queued_at": queued_at}
+    try:
+        with DEAD_LETTER_PATH.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception as e:
+        print(f"[Runner] Failed to write dead letter: {e}")
+
+
+def _run_command_on_hub(cmd: str, max_retries: int = 3, trace_id: str = None, stamps: dict = None,
+                        deadline: float = None) -> int:
+    """Runs the cached action program on the hub, passing the command on stdin.
     Returns the process return code. Retries on connection failures.
+    If trace_id is given, dispatch and hub acknowledgement times are added to stamps.
+    If deadline (time.time() value) is given, no attempt or retry starts after it
+    and RC_EXPIRED is returned instead.
     """
-    # Write the temporary script
-    TEMP_SCRIPT_PATH.write_text(_generate_action_script(cmd), encoding="utf-8")
-
-    run_cmd = [
-        sys.executable,
-        "-m", "pybricksdev",
-        "run", "ble",
-        "-n", HUB_NAME,
-        str(TEMP_SCRIPT_PATH)
-    ]
+    if stamps is None:
+        stamps = {}
+    # Same program for every command; only written to disk the first time
+    script_path = hub_program_cache.program_path(_generate_action_script())
+    hub_input = (latency.encode(cmd, trace_id, {}) if trace_id else cmd) + "\n"
+
+    run_cmd = HUB_RUN_COMMAND + [str(script_path)]
     
     for attempt in range(1, max_retries + 1):
+        if deadline is not None and time.time() >= deadline:
+            print(f"[Runner] ✗ Command expired before attempt {attempt}: {cmd}")
+            return RC_EXPIRED
         print(f"[Runner] Running on hub (attempt {attempt}/{max_retries}): {cmd}")
         try:
+            stamps["dispatch"] = latency.now()
             proc = subprocess.Popen(
                 run_cmd,
+                stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 text=True,
                 bufsize=1,
             )
+            proc.stdin.write(hub_input)
+            proc.stdin.close()
             # Stream output
             if proc.stdout is not None:
                 for line in proc.stdout:
                     if line:
+                        text = line.strip()
+                        if trace_id and text == latency.HUB_START_PREFIX + trace_id:
+                            stamps["hub_start"] = latency.now()
+                        elif trace_id and text == latency.HUB_DONE_PREFIX + trace_id:
+                            stamps["hub_done"] = latency.now()
                         print(f"[HUB] {line.rstrip()}")
             rc = proc.wait()
             
             if rc == 0:
                 print(f"[Runner] ✓ Command succeeded: {cmd}")
+                if trace_id:
+                    _record_latency(trace_id, stamps)
                 return 0
+            elif rc == hub_upload.EXIT_INCOMPATIBLE:
+                # Firmware/pybricksdev mismatch: retrying cannot help
+                print(f"[Runner] ✗ Hub or pybricksdev incompatible, not retrying: {cmd}")
+                return rc
             else:
                 print(f"[Runner] ✗ Command failed (rc={rc}): {cmd}")
-                if attempt < max_retries:
-                    print(f"[Runner] Retrying in 2 seconds...")
-                    time.sleep(2)
                     
         except Exception as e:
             print(f"[Runner] Exception on attempt {attempt}: {e}")
-            if attempt < max_retries:
-                print(f"[Runner] Retrying in 2 seconds...")
-                time.sleep(2)
+
+        if attempt < max_retries:
+            delay = _retry_delay(attempt)
+            # Don't sleep just to replay a correction that will be stale by then
+            if deadline is not None and time.time() + delay >= deadline:
+                print(f"[Runner] ✗ Command would expire before retrying: {cmd}")
+                return RC_EXPIRED
+            print(f"[Runner] Retrying in {delay:.1f} seconds...")
+            time.sleep(delay)
     
     print(f"[Runner] ✗ All {max_retries} attempts failed for: {cmd}")
     return 1
 
 
+def _deliver_command(cmd: str, trace_id: str = None, stamps: dict = None, queued_at: float = None) -> bool:
+    """Sends one command through the delivery policy. Returns True if the hub ran it.
+
+    Stale commands are dropped (also between retries), and while the circuit breaker
+    is open commands are not attempted at all; both end up in the dead-letter store,
+    as do commands that fail every retry.
+    """
+    if stamps is None:
+        stamps = {}
+    if queued_at is None:
+        queued_at = time.time()
+    # Age from when main.py emitted it if traced, else from when the runner picked it up
+    born = stamps.get("emit", queued_at)
+    deadline = born + MAX_COMMAND_AGE
+    age = time.time() - born
+    if age > MAX_COMMAND_AGE:
+        _dead_letter(cmd, f"expired after {age:.1f}s", trace_id, queued_at)
+        return False
+    if not _breaker.allow():
+        _dead_letter(cmd, "circuit open", trace_id, queued_at)
+        return False
+    # A half-open breaker gets a single probe attempt rather than a full retry cycle
+    max_retries = 1 if _breaker.state == "half-open" else 3
+    rc = _run_command_on_hub(cmd, max_retries=max_retries, trace_id=trace_id, stamps=stamps, deadline=deadline)
+    if rc == 0:
+        _breaker.record_success()
+        return True
+    if rc == RC_EXPIRED:
+        # Only counts against the hub if an attempt was actually made and failed
+        if "dispatch" in stamps:
+            _breaker.record_failure()
+        _dead_letter(cmd, f"expired after {time.time() - born:.1f}s", trace_id, queued_at)
+        return False
+    _breaker.record_failure()
+    reason = "hub incompatible" if rc == hub_upload.EXIT_INCOMPATIBLE else f"failed (rc={rc})"
+    _dead_letter(cmd, reason, trace_id, queued_at)
+    return False
+
+
+def _claim_commands():
+    """Atomically takes every pending command from the commands file.
+
+    Returns (lines, queued_at). The file is renamed to PROCESSING_FILE_PATH before it
+    is read, so lines appended meanwhile land in a fresh commands file instead of being
+    truncated away. queued_at is the file's mtime (when the last line was written), which
+    survives the rename and restarts. A batch left behind by a crash is picked up first.
+    """
+    if not PROCESSING_FILE_PATH.exists():
+        if not COMMANDS_FILE_PATH.exists() or COMMANDS_FILE_PATH.stat().st_size == 0:
+            return [], None
+        os.replace(COMMANDS_FILE_PATH, PROCESSING_FILE_PATH)
+    queued_at = PROCESSING_FILE_PATH.stat().st_mtime
+    lines = [ln.strip() for ln in PROCESSING_FILE_PATH.read_text(encoding="utf-8").splitlines() if ln.strip()]
+    return lines, queued_at
+
+
+def _release_commands(remaining: list, queued_at: float) -> None:
+    """Rewrites the processing file to hold only the commands not yet handled.
+
+    Keeps the original mtime so a batch resumed after a crash still ages from when it was
+    queued; removes the file once the batch is done.
+    """
+    if not remaining:
+        PROCESSING_FILE_PATH.unlink(missing_ok=True)
+        return
+    tmp = PROCESSING_FILE_PATH.with_suffix(".tmp")
+    tmp.write_text("".join(ln + "\n" for ln in remaining), encoding="utf-8")
+    os.utime(tmp, (queued_at, queued_at))
+    os.replace(tmp, PROCESSING_FILE_PATH)
+
+
 def main():
     print(f"[Runner] Watching commands file: {COMMANDS_FILE_PATH}")
     print(f"[Runner] Hub name: {HUB_NAME}")
-    # Ensure commands file exists
-    COMMANDS_FILE_PATH.touch(exist_ok=True)
+    # Ensure commands file exists (without touching the mtime of pending commands)
+    if not COMMANDS_FILE_PATH.exists():
+        COMMANDS_FILE_PATH.touch()
 
     while True:
         try:
-            # Read and strip commands
-            lines = [ln.strip() for ln in COMMANDS_FILE_PATH.read_text(encoding="utf-8").splitlines() if ln.strip()]
+            lines, queued_at = _claim_commands()
             if lines:
                 print(f"[Runner] Found {len(lines)} command(s)")
-                for cmd in lines:
-                    rc = _run_command_on_hub(cmd)
-                    if rc != 0:
-                        print(f"[Runner] Command failed (rc={rc}): {cmd}")
-                        # On failure, stop processing remaining commands to avoid spamming reconnects
-                        break
-                # Clear file after processing (best effort)
-                try:
-                    COMMANDS_FILE_PATH.write_text("", encoding="utf-8")
-                except Exception as e:
-                    print(f"[Runner] Failed to clear commands file: {e}")
+            # Every command is either delivered or dead-lettered; none are silently dropped.
+            # Each one is removed from the processing file as soon as it is handled, so an
+            # error mid-batch never replays commands the hub already ran.
+            for i, line in enumerate(lines):
+                cmd, trace_id, stamps = _parse_command_line(line)
+                _deliver_command(cmd, trace_id, stamps, queued_at)
+                _release_commands(lines[i + 1:], queued_at)
+            if not lines and PROCESSING_FILE_PATH.exists():
+                PROCESSING_FILE_PATH.unlink()
             # Wait 1s between polls
             time.sleep(1.0)
         except KeyboardInterrupt:
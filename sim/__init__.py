@@ -0,0 +1,5 @@
+"""
+Simulation harness: fake pybricks hub, virtual camera and a closed-loop driver.
+
+Run `python -m sim.driver --help` from the repository root.
+"""
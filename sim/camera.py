@@ -0,0 +1,103 @@
+"""
+Virtual camera for the simulation harness.
+
+Renders a coloured disc (the "target") on a plain background. The disc's
+image position depends on the simulated joint angles: the shoulder pans the
+view left/right (that is the joint main.py steers) and the elbow tilts it.
+Implements the subset of cv2.VideoCapture that main.py uses, paced to a
+webcam-like frame rate, and registers the "sim_target" detector that finds
+the disc (YOLO would not label it).
+"""
+
+import time
+
+import numpy as np
+
+import detectors
+from sim import world
+
+# BGR colour of the target disc and the background
+TARGET_COLOR = (0, 0, 255)
+BACKGROUND_COLOR = (60, 60, 60)
+# Label the sim_target detector gives the disc (use with --target_object)
+TARGET_LABEL = "target"
+
+
+class VirtualCamera:
+    def __init__(self, width=640, height=480, target_pan=30.0, target_tilt=0.0,
+                 pixels_per_degree=8.0, target_radius=30, pan_port="F", tilt_port="C", fps=30.0):
+        self.width = width
+        self.height = height
+        # Where the target sits in joint space (degrees)
+        self.target_pan = target_pan
+        self.target_tilt = target_tilt
+        self.pixels_per_degree = pixels_per_degree
+        self.target_radius = target_radius
+        self.pan_port = pan_port
+        self.tilt_port = tilt_port
+        self._open = True
+        # Like a real webcam, read() blocks until the next frame is due
+        self.frame_interval = 1.0 / fps if fps else 0.0
+        self._next_frame = time.monotonic()
+        ys, xs = np.mgrid[0:height, 0:width]
+        self._xs = xs
+        self._ys = ys
+
+    def isOpened(self):
+        return self._open
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        self._open = False
+
+    def target_position(self):
+        """Image (x, y) of the target centre for the current joint angles."""
+        joints = world.angles()
+        # Lowering the shoulder angle pulls a left-of-centre target towards the middle
+        x = self.width / 2 + (self.target_pan - joints[self.pan_port]) * self.pixels_per_degree
+        y = self.height / 2 + (self.target_tilt - joints[self.tilt_port]) * self.pixels_per_degree
+        return x, y
+
+    def read(self):
+        if not self._open:
+            return False, None
+        delay = self._next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame = max(self._next_frame, time.monotonic()) + self.frame_interval
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[:] = BACKGROUND_COLOR
+        cx, cy = self.target_position()
+        mask = (self._xs - cx) ** 2 + (self._ys - cy) ** 2 <= self.target_radius ** 2
+        frame[mask] = TARGET_COLOR
+        return True, frame
+
+
+def detect_target(frame):
+    """Bounding box (x1, y1, x2, y2) of the target disc in a frame, or None if not visible."""
+    mask = np.all(frame == TARGET_COLOR, axis=2)
+    cols = np.flatnonzero(mask.any(axis=0))
+    if cols.size == 0:
+        return None
+    rows = np.flatnonzero(mask.any(axis=1))
+    return int(cols[0]), int(rows[0]), int(cols[-1]), int(rows[-1])
+
+
+@detectors.register("sim_target")
+class SimTargetDetector:
+    color = (0, 255, 255)
+
+    def __init__(self, args):
+        pass
+
+    def detect(self, frame):
+        box = detect_target(frame)
+        if box is None:
+            return []
+        x1, y1, x2, y2 = box
+        return [detectors.Detection(x1, y1, x2, y2, TARGET_LABEL, 1.0, self.name, self.color)]
@@ -0,0 +1,202 @@
+"""
+Closed-loop performance harness: runs main.py's vision loop and the real hub
+runner (robot_runner.py) against the simulated hub and camera.
+
+Run from the repository root, no webcam or LEGO hub needed:
+    python -m sim.driver --mode track --target_pan 30
+    python -m sim.driver --mode track --detectors sim_target haar
+    python -m sim.driver --mode throughput --commands 20
+
+In track mode main.main() runs with the VirtualCamera as its capture and the
+runner's delivery path as its command sink. The disc is found by the
+"sim_target" detector plugin (YOLO would not label it); extra detectors can be
+enabled to include their cost in the timing and CPU figures.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import detectors
+import hub_program_cache
+import latency
+import main as vision
+import robot_runner
+from sim import world
+from sim.camera import TARGET_LABEL, VirtualCamera
+
+HUB_EXEC_PATH = Path(__file__).resolve().parent / "hub_exec.py"
+
+# Shoulder range the action program allows (SHOULDER_MIN/SHOULDER_MAX in robot_runner.py)
+SHOULDER_RANGE = (0, 90)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulated closed-loop benchmark")
+    parser.add_argument('--mode', default='track', choices=['track', 'throughput'],
+                        help='track: measure convergence on a target; throughput: send commands back to back')
+    parser.add_argument('--webcam_resolution', default=[640, 480], type=int, nargs=2,
+                        help='Virtual camera resolution width height')
+    parser.add_argument('--center_threshold', default=0.2, type=float,
+                        help='Fraction of frame width for center zone (same as main.py)')
+    parser.add_argument('--movement_step', default=5, type=int,
+                        help='Degrees to move robot per adjustment (same as main.py)')
+    parser.add_argument('--target_pan', default=30.0, type=float,
+                        help='Target position in shoulder degrees (track mode)')
+    parser.add_argument('--settle_frames', default=5, type=int,
+                        help='Consecutive centered frames required to count as converged')
+    parser.add_argument('--timeout', default=60.0, type=float,
+                        help='Give up tracking after this many seconds')
+    parser.add_argument('--commands', default=20, type=int,
+                        help='Number of commands to send (throughput mode)')
+    parser.add_argument('--failure_rate', default=0.0, type=float,
+                        help='Probability that a hub connection fails, to exercise the retry policy')
+    parser.add_argument('--detectors', default=['sim_target'], nargs='+', choices=sorted(detectors.DETECTORS),
+                        help='Detectors main.py runs on each frame (track mode; must include sim_target)')
+    args = parser.parse_args()
+    if args.mode == 'track':
+        validate_target(parser, args)
+        if 'sim_target' not in args.detectors:
+            parser.error("--detectors must include sim_target, the only detector that sees the simulated target")
+    return args
+
+
+def validate_target(parser, args):
+    """Rejects targets the shoulder cannot reach or that start outside the camera view."""
+    low, high = SHOULDER_RANGE
+    if not low <= args.target_pan <= high:
+        parser.error(f"--target_pan {args.target_pan:g} is outside the reachable shoulder range {low}..{high}")
+    width, height = args.webcam_resolution
+    cam = VirtualCamera(width, height, target_pan=args.target_pan)
+    # The shoulder starts at 0, so the target's first image position is known up front
+    max_pan = (width / 2 - cam.target_radius) / cam.pixels_per_degree
+    if abs(args.target_pan) > max_pan:
+        parser.error(f"--target_pan {args.target_pan:g} starts off-screen; "
+                     f"at {width}px wide the target is visible up to {max_pan:.1f} degrees")
+
+
+def setup_sim(workdir: Path, failure_rate: float = 0.0):
+    """Points the runner and the simulated world at a scratch directory."""
+    state_path = workdir / "sim_state.json"
+    os.environ["TACO_SIM_STATE"] = str(state_path)
+    os.environ["TACO_SIM_FAILURE_RATE"] = str(failure_rate)
+    world.STATE_PATH = state_path
+    world.reset()
+    # -u so TRACE_START/TRACE_DONE reach the runner as they are printed
+    robot_runner.HUB_RUN_COMMAND = [sys.executable, "-u", str(HUB_EXEC_PATH)]
+    hub_program_cache.CACHE_DIR = workdir / "hub_cache"
+    robot_runner.LATENCY_LOG_PATH = workdir / "latency_log.csv"
+    robot_runner.DEAD_LETTER_PATH = workdir / "dead_letters.jsonl"
+
+
+def send(command, trace_id, stamps, traces):
+    delivered = robot_runner._deliver_command(command, trace_id, stamps)
+    if delivered:
+        traces.append(stamps)
+    return delivered
+
+
+def run_track(args, traces):
+    """Runs main.main() until the target stays centered. Returns (converged_after_s, frames, commands)."""
+    width, height = args.webcam_resolution
+    argv = [
+        '--webcam_resolution', str(width), str(height),
+        '--center_threshold', str(args.center_threshold),
+        '--movement_step', str(args.movement_step),
+        '--target_object', TARGET_LABEL,
+        '--detectors', *args.detectors,
+        '--use_robot',
+        '--no_display',
+    ]
+    start = time.time()
+    frames = commands = streak = 0
+    centered_since = converged = None
+
+    def open_capture(frame_width, frame_height):
+        return VirtualCamera(frame_width, frame_height, target_pan=args.target_pan)
+
+    def send_command(line):
+        nonlocal commands
+        cmd, trace_id, stamps = robot_runner._parse_command_line(line)
+        if cmd == "STOP":
+            # main.py's shutdown marker; the action program has no STOP command
+            return
+        commands += 1
+        send(cmd, trace_id, stamps, traces)
+
+    def on_frame(direction):
+        nonlocal frames, streak, centered_since, converged
+        frames += 1
+        if direction != "centered":
+            streak = 0
+            return time.time() - start >= args.timeout
+        if streak == 0:
+            centered_since = time.time()
+        streak += 1
+        if streak >= args.settle_frames:
+            converged = centered_since - start
+            return True
+        return time.time() - start >= args.timeout
+
+    vision.main(argv, open_capture=open_capture, send_command=send_command, on_frame=on_frame)
+    return converged, frames, commands
+
+
+def run_throughput(args, traces):
+    """Sends args.commands shoulder moves back to back. Returns the number delivered."""
+    ok = 0
+    for i in range(args.commands):
+        step = args.movement_step if i % 2 == 0 else -args.movement_step
+        stamps = {"emit": latency.now()}
+        if send(f"SHOULDER:{step}", latency.new_trace_id(), stamps, traces):
+            ok += 1
+    return ok
+
+
+def report_latency(traces):
+    totals = {}
+    for stamps in traces:
+        for label, ms in latency.breakdown(stamps):
+            totals.setdefault(label, []).append(ms)
+    for label, values in totals.items():
+        print(f"[Sim]   {label:<22} mean {sum(values) / len(values):8.1f}ms  max {max(values):8.1f}ms")
+
+
+def main():
+    args = parse_args()
+    traces = []
+    with tempfile.TemporaryDirectory(prefix="taco_sim_") as tmp:
+        setup_sim(Path(tmp), args.failure_rate)
+        cpu_before = os.times()
+        wall_start = time.time()
+        if args.mode == 'track':
+            converged, frames, commands = run_track(args, traces)
+        else:
+            commands = run_throughput(args, traces)
+        wall = time.time() - wall_start
+        cpu_after = os.times()
+        dead_letters = robot_runner.DEAD_LETTER_PATH
+        dead = len(dead_letters.read_text(encoding="utf-8").splitlines()) if dead_letters.exists() else 0
+
+    print("[Sim] ===== Results =====")
+    if args.mode == 'track':
+        if converged is None:
+            print(f"[Sim] Did not converge within {args.timeout:.0f}s")
+        else:
+            print(f"[Sim] Converged after {converged:.2f}s")
+        print(f"[Sim] Frames processed: {frames} ({frames / wall:.1f} fps)")
+    print(f"[Sim] Commands sent: {commands} ({commands / wall:.2f} cmd/s), dead-lettered: {dead}")
+    own_cpu = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    child_cpu = (cpu_after.children_user - cpu_before.children_user) + (cpu_after.children_system - cpu_before.children_system)
+    print(f"[Sim] CPU: driver {own_cpu:.2f}s, hub processes {child_cpu:.2f}s, "
+          f"{100.0 * (own_cpu + child_cpu) / wall:.0f}% of one core over {wall:.2f}s")
+    if traces:
+        print("[Sim] Per-command latency:")
+        report_latency(traces)
+
+
+if __name__ == "__main__":
+    main()
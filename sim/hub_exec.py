@@ -0,0 +1,31 @@
+"""
+Runs a hub program against the simulated pybricks package.
+
+Drop-in replacement for `python -m pybricksdev run ble -n <hub> <script>`:
+    python sim/hub_exec.py <script>
+Works for the generated action scripts as well as robot_hub.py (stdin) and robot.py.
+Set TACO_SIM_FAILURE_RATE (0..1) to make that share of runs fail to "connect".
+"""
+
+import os
+import random
+import runpy
+import sys
+from pathlib import Path
+
+SIM_DIR = Path(__file__).resolve().parent
+
+
+def main():
+    if len(sys.argv) != 2:
+        raise SystemExit("usage: python sim/hub_exec.py <hub_program.py>")
+    if random.random() < float(os.environ.get("TACO_SIM_FAILURE_RATE", "0")):
+        print("Simulated connection failure: hub not found")
+        raise SystemExit(1)
+    # Make `import pybricks` resolve to sim/pybricks
+    sys.path.insert(0, str(SIM_DIR))
+    runpy.run_path(sys.argv[1], run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
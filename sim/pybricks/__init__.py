@@ -0,0 +1,6 @@
+"""
+Stand-in for the Pybricks MicroPython API, used by the simulation harness.
+
+Only the parts that robot_hub.py, robot.py and the generated action scripts
+use are provided. Motors are backed by sim/world.py.
+"""
@@ -0,0 +1,23 @@
+class _Light:
+    def on(self, color=None):
+        pass
+
+    def off(self):
+        pass
+
+
+class _Display:
+    def text(self, text, on=None, off=None):
+        pass
+
+    def off(self):
+        pass
+
+
+class InventorHub:
+    def __init__(self, *args, **kwargs):
+        self.light = _Light()
+        self.display = _Display()
+
+
+PrimeHub = InventorHub
@@ -0,0 +1,18 @@
+class Port:
+    A = "A"
+    B = "B"
+    C = "C"
+    D = "D"
+    E = "E"
+    F = "F"
+
+
+class Stop:
+    COAST = "coast"
+    BRAKE = "brake"
+    HOLD = "hold"
+
+
+class Direction:
+    CLOCKWISE = 1
+    COUNTERCLOCKWISE = -1
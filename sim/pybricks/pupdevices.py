@@ -0,0 +1,68 @@
+import time
+
+import world
+from pybricks.parameters import Direction
+
+
+class Motor:
+    """Simulated motor: moves at the requested speed (capped at world.MAX_SPEED)
+    and stops at the mechanical limits in world.LIMITS.
+    """
+
+    def __init__(self, port, positive_direction=Direction.CLOCKWISE, gears=None, reset_angle=True):
+        if port not in world.LIMITS:
+            raise OSError(f"No motor on port {port}")
+        self.port = port
+
+    def _update(self, **fields):
+        state = world.load()
+        motor = state["motors"][self.port]
+        motor.update(fields)
+        world.save(state)
+        return motor
+
+    def _record(self):
+        return world.load()["motors"][self.port]
+
+    def angle(self):
+        return int(round(world.motor_angle(self._record())))
+
+    def speed(self):
+        motor = self._record()
+        return int(motor["speed"]) if world.motion_time(motor) > 0 else 0
+
+    def done(self):
+        return world.motion_time(self._record()) <= 0
+
+    def reset_angle(self, angle=None):
+        angle = 0 if angle is None else angle
+        self._update(start_angle=float(angle), target=float(angle), speed=0.0, t0=time.time())
+
+    def stop(self):
+        here = world.motor_angle(self._record())
+        self._update(start_angle=here, target=here, speed=0.0, t0=time.time())
+
+    brake = stop
+    hold = stop
+
+    def run_target(self, speed, target_angle, then=None, wait=True):
+        here = world.motor_angle(self._record())
+        speed = min(abs(speed), world.MAX_SPEED)
+        motor = self._update(
+            start_angle=here,
+            target=float(world.clamp(self.port, target_angle)),
+            speed=float(speed),
+            t0=time.time(),
+        )
+        if wait:
+            time.sleep(world.motion_time(motor))
+
+    def run_angle(self, speed, rotation_angle, then=None, wait=True):
+        here = world.motor_angle(self._record())
+        direction = 1 if speed >= 0 else -1
+        self.run_target(speed, here + direction * rotation_angle, then, wait)
+
+    def run_until_stalled(self, speed, then=None, duty_limit=None):
+        low, high = world.LIMITS[self.port]
+        self.run_target(speed, high if speed > 0 else low, then, wait=True)
+        return self.angle()
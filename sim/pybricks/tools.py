@@ -0,0 +1,16 @@
+import time
+
+
+def wait(time_ms):
+    time.sleep(time_ms / 1000.0)
+
+
+class StopWatch:
+    def __init__(self):
+        self._start = time.time()
+
+    def time(self):
+        return int((time.time() - self._start) * 1000)
+
+    def reset(self):
+        self._start = time.time()
@@ -0,0 +1,87 @@
+"""
+Shared state of the simulated robot.
+
+Every hub program runs in its own process (just like `pybricksdev run ble`),
+so motor state lives in a small JSON file that the fake pybricks motors and
+the virtual camera both read. Motion is modelled from wall-clock time: a
+motor moving to a target at some speed reports an interpolated angle until
+it gets there.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+# State file location; sim/driver.py points this at a temp directory
+STATE_PATH = Path(os.environ.get("TACO_SIM_STATE", Path(__file__).parent / "_sim_state.json"))
+
+# Top speed of a SPIKE medium/large motor (deg/s); faster requests are clamped
+MAX_SPEED = 1000
+
+# Mechanical limits per port (degrees). Moves past these stop at the limit,
+# and run_until_stalled() stops here.
+LIMITS = {
+    "A": (0, 90),       # gripper
+    "B": (-360, 360),   # base
+    "C": (-90, 150),    # elbow
+    "D": (-3600, 3600),
+    "E": (-3600, 3600),
+    "F": (-120, 120),   # shoulder
+}
+
+
+def _idle_motor(angle=0.0):
+    return {"start_angle": angle, "target": angle, "speed": 0.0, "t0": 0.0}
+
+
+def reset(angles=None):
+    """Writes a fresh state file with all motors at rest (default angle 0)."""
+    angles = angles or {}
+    state = {"motors": {port: _idle_motor(float(angles.get(port, 0.0))) for port in LIMITS}}
+    save(state)
+    return state
+
+
+def load():
+    try:
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return reset()
+
+
+def save(state):
+    # Write then rename so readers never see a half-written file
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, STATE_PATH)
+
+
+def clamp(port, angle):
+    low, high = LIMITS[port]
+    return max(low, min(high, angle))
+
+
+def motor_angle(motor, t=None):
+    """Angle of a motor record at time t (defaults to now)."""
+    t = time.time() if t is None else t
+    start, target, speed = motor["start_angle"], motor["target"], motor["speed"]
+    if speed <= 0 or start == target:
+        return target
+    travelled = speed * max(0.0, t - motor["t0"])
+    if travelled >= abs(target - start):
+        return target
+    return start + travelled if target > start else start - travelled
+
+
+def motion_time(motor):
+    """Seconds left until a motor record reaches its target."""
+    remaining = abs(motor["target"] - motor_angle(motor))
+    return remaining / motor["speed"] if motor["speed"] > 0 else 0.0
+
+
+def angles():
+    """Current angle of every port, e.g. {"F": 12.5, ...}."""
+    state = load()
+    now = time.time()
+    return {port: motor_angle(m, now) for port, m in state["motors"].items()}